@@ -3,11 +3,46 @@ Module permettant de vérifier la validité d'une adresse et de récupérer sa l
 """
 
 ####################################################################################################
-### Importation des modules nécessaires ############################################################
+### Géolocalisateur ################################################################################
 ####################################################################################################
 
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-from geopy.geocoders import Nominatim
+# Géolocalisateur partagé, créé à la première utilisation
+_GEOLOCATOR = None
+
+
+def get_geolocator():
+    """
+    Retourne le géolocalisateur Nominatim partagé.
+
+    geopy n'est importé qu'au premier appel afin de ne pas ralentir le démarrage de l'API.
+    :return: Géolocalisateur Nominatim.
+    """
+    global _GEOLOCATOR  # pylint: disable=global-statement
+    if _GEOLOCATOR is None:
+        # pylint: disable-next=import-outside-toplevel
+        from geopy.geocoders import Nominatim
+        _GEOLOCATOR = Nominatim(user_agent="geo_checker")
+    return _GEOLOCATOR
+
+
+def set_geolocator(geolocator) -> None:
+    """
+    Remplace le géolocalisateur partagé (par exemple par un géolocalisateur local pour les tests
+    de charge). Il doit fournir les méthodes `geocode(query)` et `reverse(position)` de geopy.
+    :param geolocator: Géolocalisateur à utiliser, None pour revenir à Nominatim.
+    """
+    global _GEOLOCATOR  # pylint: disable=global-statement
+    _GEOLOCATOR = geolocator
+
+
+def geocoder_errors() -> tuple:
+    """
+    Retourne les exceptions du géolocalisateur considérées comme des échecs de vérification.
+    :return: Tuple des classes d'exception.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+    return GeocoderTimedOut, GeocoderServiceError
 
 
 ####################################################################################################
@@ -35,18 +70,17 @@ class Address:
     def check_validity(self):
         """
         Vérifie la validité de l'adresse et récupère sa latitude et sa longitude si elle est valide.
+
+        Les erreurs du géolocalisateur (voir `geocoder_errors`) sont propagées : une adresse ne
+        peut pas être déclarée invalide lorsque le service ne répond pas.
         :return: None
         """
-        try:
-            geolocator = Nominatim(user_agent="geo_checker")
-            location = geolocator.geocode(self.address)
-            if location:
-                self.address_location = location.address
-                self.valid = True
-                self.latitude = location.latitude
-                self.longitude = location.longitude
-        except (GeocoderTimedOut, GeocoderServiceError) as e:
-            print(f"Erreur lors de la vérification de l'adresse : {e}")
+        location = get_geolocator().geocode(self.address)
+        if location:
+            self.address_location = location.address
+            self.valid = True
+            self.latitude = location.latitude
+            self.longitude = location.longitude
 
     def __str__(self) -> str:
         """
@@ -77,10 +111,9 @@ class Address:
         :return: True si l'adresse est valide, False sinon.
         """
         try:
-            geolocator = Nominatim(user_agent="geo_checker")
-            location = geolocator.geocode(addr)
+            location = get_geolocator().geocode(addr)
             return bool(location)
-        except (GeocoderTimedOut, GeocoderServiceError):
+        except geocoder_errors():
             return False
 
     @staticmethod
@@ -90,8 +123,7 @@ class Address:
         :param position: Position à convertir en adresse.
         :return: Adresse correspondant à la position.
         """
-        geolocator = Nominatim(user_agent="geo_checker")
-        location = geolocator.reverse(position)
+        location = get_geolocator().reverse(position)
         return Address(location.address)
 
 
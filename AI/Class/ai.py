@@ -1,6 +1,10 @@
 """
 Ce module contient la classe AI pour l'entraînement et la prédiction des résultats des enquêtes
 criminelles à San Francisco en utilisant divers modèles d'apprentissage automatique.
+
+Les modèles de l'ensemble proviennent d'un registre : chaque membre déclare la manière dont il est
+construit et entraîné, la manière dont il prédit un lot de données, ainsi que sa précision et sa
+latence mesurées après l'entraînement.
 """
 
 ####################################################################################################
@@ -8,17 +12,14 @@ criminelles à San Francisco en utilisant divers modèles d'apprentissage automa
 ####################################################################################################
 
 import os
+import time
 import warnings
 from collections import Counter
+from typing import Any, Callable, Optional
 
 import pandas as pd
 from category_encoders import OrdinalEncoder
 from pydantic import BaseModel
-from sklearn import tree
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
-from sklearn.neighbors import KNeighborsClassifier
 
 
 ####################################################################################################
@@ -41,13 +42,227 @@ class ModelAccuracy(BaseModel):
     """
     Modèle de données pour la précision des modèles entraînés.
     """
-    # Précision de l'arbre de décision
-    tree: float
-    # Précision de la forêt aléatoire
-    rf: float
-    # Précision du K-Nearest Neighbors
-    knn: float
+    # Précision de chaque modèle de l'ensemble, par nom (en %)
+    accuracies: dict[str, float]
+    # Latence d'une prédiction unitaire de chaque modèle de l'ensemble, par nom (en ms)
+    latencies: dict[str, float]
+
+
+class EnsembleConfig(BaseModel):
+    """
+    Modèle de données pour la configuration de l'ensemble de modèles.
+    """
+    # Noms des modèles de l'ensemble (par défaut : tree, rf et knn)
+    models: Optional[list[str]] = None
+    # Budget de latence par prédiction (en ms), None pour aucun budget
+    latency_budget_ms: Optional[float] = None
+
+
+####################################################################################################
+### Classe ModelEntry ##############################################################################
+####################################################################################################
+
+class ModelEntry:
+    """
+    Membre du registre : un modèle, sa fabrique et ses mesures de précision et de latence.
+    """
+
+    def __init__(self, name: str, description: str, factory: Callable[[], Any]):
+        """
+        Initialise un membre du registre.
+
+        :param name: Nom court du modèle (utilisé dans la configuration et dans /accuracy).
+        :param description: Description lisible du modèle.
+        :param factory: Fonction sans argument retournant un estimateur scikit-learn non entraîné.
+        """
+        self.name = name
+        self.description = description
+        self.factory = factory
+        self.estimator: Optional[Any] = None
+        # Précision mesurée sur le jeu de validation (en %)
+        self.accuracy: float = 0.0
+        # Latence moyenne d'une prédiction sur une seule ligne (en ms)
+        self.latency_ms: float = 0.0
+
+    def fit(self, x_train: pd.DataFrame, y_train: pd.Series) -> 'ModelEntry':
+        """
+        Construit et entraîne l'estimateur.
+
+        :param x_train: Caractéristiques d'entraînement.
+        :param y_train: Cibles d'entraînement.
+        :return: Le membre lui-même.
+        """
+        self.estimator = self.factory().fit(x_train, y_train)
+        return self
+
+    def predict_batch(self, x: pd.DataFrame) -> list:
+        """
+        Prédit un lot de données.
+
+        :param x: DataFrame encodé des données à prédire.
+        :return: Liste des prédictions, une par ligne.
+        """
+        if self.estimator is None:
+            raise ValueError(f"Le modèle '{self.name}' n'est pas entraîné")
+        return list(self.estimator.predict(x))
+
+    def evaluate(self, x_test: pd.DataFrame, y_test: pd.Series, repeats: int = 5) -> None:
+        """
+        Mesure la précision sur le jeu de validation et la latence d'une prédiction unitaire.
+
+        :param x_test: Caractéristiques de validation.
+        :param y_test: Cibles de validation.
+        :param repeats: Nombre de prédictions unitaires chronométrées.
+        """
+        # Import différé : module utile uniquement pendant l'entraînement
+        # pylint: disable-next=import-outside-toplevel
+        from sklearn.metrics import accuracy_score
+
+        self.accuracy = accuracy_score(y_test, self.predict_batch(x_test)) * 100
+
+        single_row = x_test.iloc[:1]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            self.predict_batch(single_row)
+        self.latency_ms = (time.perf_counter() - start) * 1000 / repeats
+
+
+####################################################################################################
+### Classe ModelRegistry ###########################################################################
+####################################################################################################
+
+class ModelRegistry:
+    """
+    Registre des modèles disponibles pour l'ensemble.
+    """
+
+    # Noms réservés aux clés globales de la réponse de /accuracy (voir `AI.get_accuracy`)
+    reserved_names: tuple[str, ...] = ('global_accuracy', 'latency_ms')
+
+    def __init__(self):
+        """
+        Initialise un registre vide.
+        """
+        self.entries: dict[str, ModelEntry] = {}
+
+    def register(self, name: str, description: str, factory: Callable[[], Any]) -> ModelEntry:
+        """
+        Enregistre un nouveau modèle.
+
+        :param name: Nom court du modèle.
+        :param description: Description lisible du modèle.
+        :param factory: Fonction sans argument retournant un estimateur non entraîné.
+        :return: Le membre créé.
+        """
+        if name in self.reserved_names:
+            raise ValueError(f"Le nom '{name}' est réservé")
+        if name in self.entries:
+            raise ValueError(f"Le modèle '{name}' est déjà enregistré")
+        entry = ModelEntry(name, description, factory)
+        self.entries[name] = entry
+        return entry
+
+    def get(self, names: list[str]) -> list[ModelEntry]:
+        """
+        Retourne les membres correspondant aux noms donnés, dans l'ordre donné.
+
+        :param names: Noms des modèles voulus.
+        :return: Liste des membres.
+        """
+        unknown = [name for name in names if name not in self.entries]
+        if unknown:
+            raise ValueError(
+                f"Modèle(s) inconnu(s) : {', '.join(unknown)}. "
+                f"Disponibles : {', '.join(self.entries)}"
+            )
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Modèle(s) en double : {', '.join(duplicates)}")
+        return [self.entries[name] for name in names]
+
+    def names(self) -> list[str]:
+        """
+        Retourne les noms de tous les modèles enregistrés.
+
+        :return: Liste des noms.
+        """
+        return list(self.entries)
+
+
+####################################################################################################
+### Sélection selon la latence #####################################################################
+####################################################################################################
+
+def select_within_budget(entries: list[ModelEntry],
+                         latency_budget_ms: Optional[float]) -> list[ModelEntry]:
+    """
+    Sélectionne les membres de l'ensemble dont la latence cumulée respecte le budget.
+
+    Les membres sont retenus par ordre de précision décroissante tant que le budget le permet.
+    Au moins un membre (le plus rapide) est toujours conservé.
 
+    :param entries: Membres entraînés et évalués.
+    :param latency_budget_ms: Budget de latence par prédiction (en ms), None pour aucun budget.
+    :return: Membres retenus, dans leur ordre d'origine.
+    """
+    if latency_budget_ms is None:
+        return list(entries)
+
+    kept: list[ModelEntry] = []
+    total = 0.0
+    for entry in sorted(entries, key=lambda e: e.accuracy, reverse=True):
+        if total + entry.latency_ms <= latency_budget_ms:
+            kept.append(entry)
+            total += entry.latency_ms
+
+    if not kept and entries:
+        kept.append(min(entries, key=lambda e: e.latency_ms))
+
+    return [entry for entry in entries if entry in kept]
+
+
+####################################################################################################
+### Registre par défaut ############################################################################
+####################################################################################################
+
+# Ensemble utilisé lorsque aucune configuration n'est fournie
+DEFAULT_MODELS: list[str] = ['tree', 'rf', 'knn']
+
+
+def default_registry() -> ModelRegistry:
+    """
+    Crée le registre contenant les modèles fournis avec l'application.
+
+    Les modules scikit-learn de chaque modèle ne sont importés qu'à la construction de
+    l'estimateur, afin de ne pas charger ceux des modèles absents de l'ensemble.
+
+    :return: Registre par défaut.
+    """
+    # pylint: disable=import-outside-toplevel
+
+    def make_tree():
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier()
+
+    def make_rf():
+        from sklearn.ensemble import RandomForestClassifier
+        # noinspection PyTypeChecker
+        return RandomForestClassifier(n_estimators=100, random_state=42)
+
+    def make_knn():
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(n_neighbors=2)
+
+    def make_hgb():
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(random_state=42)
+
+    registry = ModelRegistry()
+    registry.register('tree', "Arbre de décision", make_tree)
+    registry.register('rf', "Forêt aléatoire", make_rf)
+    registry.register('knn', "K-Nearest Neighbors", make_knn)
+    registry.register('hgb', "Gradient boosting par histogrammes", make_hgb)
+    return registry
 
 ####################################################################################################
 ### Classe AI ######################################################################################
@@ -65,14 +280,12 @@ class AI:
 
     # Encodeur ordinal pour les caractéristiques catégorielles
     encoder: OrdinalEncoder
-    # Classificateur d'arbre de décision
-    clf: tree.DecisionTreeClassifier
-    # Classificateur de forêt aléatoire
-    rf_classifier: RandomForestClassifier
-    # Classificateur K-Nearest Neighbors
-    knn: KNeighborsClassifier
+    # Membres de l'ensemble effectivement utilisés pour les prédictions
+    members: list[ModelEntry]
     # Précision des modèles entraînés
     acc: ModelAccuracy
+    # Nombre de prédictions de l'ensemble par catégorie sur un échantillon de test.csv
+    prediction_reference: Counter
 
     # Mappage des prédictions aux catégories
     prediction_mapping: dict = {
@@ -82,14 +295,23 @@ class AI:
         3: 'Aucune Action Juridique Prise'
     }
 
-    def __init__(self, directory: str, train_file: str, test_file: str) -> None:
+    def __init__(self, directory: str, train_file: str, test_file: str, *,
+                 config: Optional[EnsembleConfig] = None,
+                 registry: Optional[ModelRegistry] = None) -> None:
         """
         Initialise la classe AI avec les données d'entraînement et de test.
 
         :param directory: Répertoire contenant les fichiers CSV.
         :param train_file: Fichier CSV avec les données d'entraînement.
         :param test_file: Fichier CSV avec les données de test.
+        :param config: Configuration de l'ensemble. Les modèles les moins précis sont écartés tant
+            que la latence cumulée dépasse le budget de latence.
+        :param registry: Registre des modèles disponibles (par défaut : registre fourni).
         """
+        config = config if config is not None else EnsembleConfig()
+        registry = registry if registry is not None else default_registry()
+        self.members = registry.get(config.models if config.models else DEFAULT_MODELS)
+        self.latency_budget_ms = config.latency_budget_ms
 
         self.load_data(
             train_file_path=os.path.join(directory, train_file),
@@ -98,6 +320,7 @@ class AI:
         self.categorize_data()
         self.sample_data()
         self.train_models()
+        self.compute_prediction_reference()
 
     def load_data(self, train_file_path, test_file_path):
         """
@@ -163,8 +386,13 @@ class AI:
 
     def train_models(self):
         """
-        Entraîne les modèles d'arbre de décision, de forêt aléatoire et de KNN.
+        Entraîne les modèles de l'ensemble, mesure leur précision et leur latence, puis écarte
+        ceux qui ne tiennent pas dans le budget de latence.
         """
+        # Import différé : module utile uniquement pendant l'entraînement
+        # pylint: disable-next=import-outside-toplevel
+        from sklearn.model_selection import train_test_split
+
         df_train_patch_sample: pd.DataFrame = self.sample_data()
         y = df_train_patch_sample.Categorie
         x = df_train_patch_sample.drop(['Categorie'], axis=1)
@@ -172,22 +400,65 @@ class AI:
             x, y, test_size=0.33, random_state=42
         )
 
-        self.clf = tree.DecisionTreeClassifier().fit(x_train, y_train)
-        accuracy_tree = self.clf.score(x_test, y_test) * 100
-        print(f'Précision de l\'arbre de décision: {accuracy_tree:.2f}%')
+        for member in self.members:
+            member.fit(x_train, y_train).evaluate(x_test, y_test)
+            print(f'Précision du modèle {member.description}: {member.accuracy:.2f}% '
+                  f'({member.latency_ms:.2f} ms)')
 
-        # noinspection PyTypeChecker
-        self.rf_classifier = RandomForestClassifier(
-            n_estimators=100, random_state=42
-        ).fit(x_train, y_train)
-        accuracy_rf = accuracy_score(y_test, self.rf_classifier.predict(x_test)) * 100
-        print(f'Précision de la forêt aléatoire: {accuracy_rf:.2f}%')
+        selected = select_within_budget(self.members, self.latency_budget_ms)
+        for member in self.members:
+            if member not in selected:
+                print(f'Modèle {member.description} écarté (budget de latence dépassé)')
+        self.members = selected
 
-        self.knn = KNeighborsClassifier(n_neighbors=2).fit(x_train, y_train)
-        accuracy_knn = accuracy_score(y_test, self.knn.predict(x_test)) * 100
-        print(f'Précision du KNN: {accuracy_knn:.2f}%')
+        self.acc = ModelAccuracy(
+            accuracies={member.name: member.accuracy for member in self.members},
+            latencies={member.name: member.latency_ms for member in self.members}
+        )
 
-        self.acc = ModelAccuracy(tree=accuracy_tree, rf=accuracy_rf, knn=accuracy_knn)
+    def compute_prediction_reference(self, size: int = 5000):
+        """
+        Calcule la répartition des prédictions de l'ensemble sur un échantillon de test.csv,
+        référence du suivi de la dérive de la classe prédite.
+
+        L'ensemble est entraîné sur un échantillon équilibré par catégorie : la répartition de ses
+        prédictions diffère de celle des catégories de train.csv comme de celle du jeu de
+        validation. test.csv suit la distribution réelle des incidents, sur des semaines absentes
+        de l'entraînement.
+
+        :param size: Nombre maximal de lignes de test.csv utilisées.
+        """
+        sample = self.sample_test(size)
+        new_df = sample[['Dates', 'DayOfWeek', 'PdDistrict', 'Address', 'X', 'Y']].assign(
+            Categorie=None
+        )
+        new_df_encoded = self.encoder.transform(new_df).drop(columns=['Categorie'])
+        self.prediction_reference = Counter(self.predict_encoded_batch(new_df_encoded))
+
+    def sample_test(self, size: int = 5000) -> pd.DataFrame:
+        """
+        Échantillonne test.csv de façon reproductible, pour les références du suivi de la dérive.
+
+        :param size: Nombre maximal de lignes retournées.
+        :return: DataFrame de l'échantillon.
+        """
+        return self.df_test.sample(min(size, len(self.df_test)), random_state=42)
+
+    def predict_encoded_batch(self, x: pd.DataFrame) -> list[str]:
+        """
+        Prédit un lot de données déjà encodées avec l'ensemble.
+
+        :param x: DataFrame encodé des données à prédire.
+        :return: Liste des catégories prédites, une par ligne.
+        """
+        predictions = self.make_predictions(x)
+        return [
+            self.prediction_mapping.get(
+                self.determine_final_prediction([(prediction[row],) for prediction in predictions]),
+                "Catégorie inconnue"
+            )
+            for row in range(len(x))
+        ]
 
     def predict(self, d: Data):
         """
@@ -228,53 +499,67 @@ class AI:
 
     def make_predictions(self, new_df_encoded: pd.DataFrame) -> list:
         """
-        Fait des prédictions avec les trois modèles.
+        Fait des prédictions avec chaque modèle de l'ensemble.
 
         :param new_df_encoded: DataFrame encodé des nouvelles données.
-        :return: Liste des prédictions des trois modèles.
+        :return: Liste des prédictions, une par modèle, dans l'ordre des membres.
         """
-        tree_prediction = self.clf.predict(new_df_encoded)
-        rf_prediction = self.rf_classifier.predict(new_df_encoded)
-        knn_prediction = self.knn.predict(new_df_encoded)
-        return [tuple(tree_prediction), tuple(rf_prediction), tuple(knn_prediction)]
+        return [tuple(member.predict_batch(new_df_encoded)) for member in self.members]
 
     def determine_final_prediction(self, predictions: list) -> int:
         """
-        Détermine la prédiction finale en fonction des prédictions des modèles.
+        Détermine la prédiction finale par vote majoritaire des modèles. En cas d'égalité, la
+        prédiction du modèle le plus précis parmi les ex aequo l'emporte.
 
-        :param predictions: Liste des prédictions des trois modèles.
+        :param predictions: Liste des prédictions, une par modèle, dans l'ordre des membres.
         :return: Prédiction finale.
         """
         prediction_counts = Counter(predictions)
-        most_common_prediction, count = prediction_counts.most_common(1)[0]
-
-        if count == 1:
-            model_predictions = {
-                'tree': predictions[0],
-                'rf': predictions[1],
-                'knn': predictions[2]
-            }
-            accuracies = {'tree': self.acc.tree, 'rf': self.acc.rf, 'knn': self.acc.knn}
-            most_accurate_model = max(accuracies, key=accuracies.get)
-            final_prediction = model_predictions[most_accurate_model]
+        best_count = max(prediction_counts.values())
+        tied = {prediction for prediction, count in prediction_counts.items()
+                if count == best_count}
+
+        if len(tied) > 1:
+            candidates = [
+                (self.acc.accuracies[member.name], prediction)
+                for member, prediction in zip(self.members, predictions)
+                if prediction in tied
+            ]
+            final_prediction = max(candidates, key=lambda candidate: candidate[0])[1]
         else:
-            final_prediction = most_common_prediction
+            final_prediction = tied.pop()
 
         return int(final_prediction[0])
 
+    def reference_profile(self) -> dict:
+        """
+        Calcule le profil des données d'entraînement servant de référence au suivi de la dérive.
+
+        :return: Dictionnaire des comptages par district, par heure et par catégorie prédite (voir
+            `compute_prediction_reference`), ensemble des adresses connues, et taux d'adresses
+            inconnues à l'entraînement sur un échantillon de test.csv.
+        """
+        categorized = self.df_train[self.df_train['Categorie'] != '']
+        addresses = set(self.df_train['Address'])
+        return {
+            'districts': categorized['PdDistrict'].value_counts().to_dict(),
+            'hours': categorized['Dates'].str[11:13].astype(int).value_counts().to_dict(),
+            'classes': dict(self.prediction_reference),
+            'addresses': addresses,
+            'unseen_rate': float((~self.sample_test()['Address'].isin(addresses)).mean())
+        }
+
     def get_accuracy(self) -> dict:
         """
-        Obtient la précision des modèles entraînés.
+        Obtient la précision des modèles de l'ensemble effectivement utilisés.
 
         :return: Dictionnaire contenant la précision de chaque modèle et la précision globale.
         """
+        accuracies = self.acc.accuracies
         return {
-            'tree': self.acc.tree,  # Précision de l'arbre de décision
-            'rf': self.acc.rf,  # Précision de la forêt aléatoire
-            'knn': self.acc.knn,  # Précision du K-Nearest Neighbors
-            'global_accuracy': (
-                                       self.acc.tree + self.acc.rf + self.acc.knn
-                               ) / 3  # Précision globale moyenne
+            **accuracies,  # Précision de chaque modèle, par nom
+            'global_accuracy': sum(accuracies.values()) / len(accuracies),  # Précision moyenne
+            'latency_ms': self.acc.latencies  # Latence d'une prédiction unitaire, par nom
         }
 
 
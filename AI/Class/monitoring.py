@@ -0,0 +1,476 @@
+"""
+Ce module contient les statistiques en flux calculées sur les prédictions servies par l'API.
+
+Chaque prédiction est enregistrée en temps constant et en mémoire bornée : compteurs exacts pour les
+domaines de petite taille (district, heure, classe prédite), Count-Min Sketch et HyperLogLog pour
+les adresses, et échantillon par réservoir des requêtes. Les scores de dérive (Population Stability
+Index) sont calculés à la demande par rapport au profil des données d'entraînement, ce qui permet de
+décider d'un ré-entraînement sans recalcul par lots.
+"""
+
+####################################################################################################
+### Importation des modules nécessaires ############################################################
+####################################################################################################
+
+import hashlib
+import math
+import random
+import threading
+from collections import Counter
+from typing import Optional
+
+
+####################################################################################################
+### Fonctions utilitaires ##########################################################################
+####################################################################################################
+
+def hash64(value: str, seed: int = 0) -> int:
+    """
+    Retourne un hachage 64 bits stable d'une chaîne de caractères.
+
+    :param value: Chaîne à hacher.
+    :param seed: Graine permettant d'obtenir des fonctions de hachage indépendantes.
+    :return: Entier non signé de 64 bits.
+    """
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8,
+                             salt=seed.to_bytes(16, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+def population_stability_index(reference: dict, live: dict, epsilon: float = 1e-4) -> float:
+    """
+    Calcule le Population Stability Index entre deux distributions de comptages.
+
+    Usage courant : < 0.1 stable, de 0.1 à 0.25 dérive modérée, > 0.25 dérive importante.
+
+    :param reference: Comptages de référence par catégorie.
+    :param live: Comptages observés par catégorie.
+    :param epsilon: Proportion minimale, pour éviter les divisions par zéro.
+    :return: Score PSI, 0 si l'une des distributions est vide.
+    """
+    reference_total = sum(reference.values())
+    live_total = sum(live.values())
+    if reference_total == 0 or live_total == 0:
+        return 0.0
+
+    psi = 0.0
+    for key in set(reference) | set(live):
+        expected = max(reference.get(key, 0) / reference_total, epsilon)
+        actual = max(live.get(key, 0) / live_total, epsilon)
+        psi += (actual - expected) * math.log(actual / expected)
+    return psi
+
+
+####################################################################################################
+### Classe CountMinSketch ##########################################################################
+####################################################################################################
+
+class CountMinSketch:
+    """
+    Count-Min Sketch : estimation des fréquences en mémoire fixe (surestimation bornée).
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialise le sketch.
+
+        :param width: Nombre de compteurs par ligne.
+        :param depth: Nombre de lignes (fonctions de hachage indépendantes).
+        """
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+
+    def indexes(self, key: str) -> list[int]:
+        """
+        Retourne l'indice du compteur de la clé dans chaque ligne.
+
+        Un seul hachage de 64 bits est calculé ; les indices en sont dérivés par double hachage.
+        Le pas est rendu impair pour que les lignes ne retombent pas sur les mêmes compteurs
+        lorsque la largeur est une puissance de deux.
+
+        :param key: Clé à hacher.
+        :return: Liste des indices, un par ligne.
+        """
+        hashed = hash64(key)
+        low, high = hashed & 0xFFFFFFFF, (hashed >> 32) | 1
+        return [(low + row * high) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Ajoute une occurrence de la clé.
+
+        :param key: Clé observée.
+        :param count: Nombre d'occurrences.
+        :return: Nouvelle estimation de la fréquence de la clé.
+        """
+        estimate = None
+        for row, index in enumerate(self.indexes(key)):
+            self.table[row][index] += count
+            value = self.table[row][index]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """
+        Estime la fréquence d'une clé.
+
+        :param key: Clé recherchée.
+        :return: Estimation de la fréquence.
+        """
+        return min(self.table[row][index] for row, index in enumerate(self.indexes(key)))
+
+
+####################################################################################################
+### Classe HyperLogLog #############################################################################
+####################################################################################################
+
+class HyperLogLog:
+    """
+    HyperLogLog : estimation du nombre de valeurs distinctes en mémoire fixe.
+    """
+
+    def __init__(self, precision: int = 12):
+        """
+        Initialise l'estimateur.
+
+        :param precision: Nombre de bits d'indexation (2**precision registres).
+        """
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = [0] * self.size
+        self.alpha = 0.7213 / (1 + 1.079 / self.size)
+
+    def add(self, key: str) -> None:
+        """
+        Ajoute une valeur.
+
+        :param key: Valeur observée.
+        """
+        hashed = hash64(key, seed=1)
+        index = hashed & (self.size - 1)
+        remaining = hashed >> self.precision
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> float:
+        """
+        Estime le nombre de valeurs distinctes observées.
+
+        :return: Estimation du nombre de valeurs distinctes.
+        """
+        estimate = self.alpha * self.size ** 2 / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Correction pour les petites cardinalités (comptage linéaire)
+            estimate = self.size * math.log(self.size / zeros)
+        return estimate
+
+
+####################################################################################################
+### Classe ReservoirSample #########################################################################
+####################################################################################################
+
+class ReservoirSample:
+    """
+    Échantillon uniforme de taille fixe d'un flux (algorithme R).
+    """
+
+    def __init__(self, capacity: int = 500, seed: Optional[int] = None):
+        """
+        Initialise l'échantillon.
+
+        :param capacity: Nombre maximal d'éléments conservés.
+        :param seed: Graine du générateur aléatoire.
+        """
+        self.capacity = capacity
+        self.reservoir: list = []
+        self.seen = 0
+        self.random = random.Random(seed)
+
+    def __len__(self) -> int:
+        """
+        Retourne le nombre d'éléments conservés.
+
+        :return: Nombre d'éléments de l'échantillon.
+        """
+        return len(self.reservoir)
+
+    def add(self, item) -> None:
+        """
+        Ajoute un élément du flux.
+
+        :param item: Élément observé.
+        """
+        self.seen += 1
+        if len(self.reservoir) < self.capacity:
+            self.reservoir.append(item)
+        else:
+            slot = self.random.randrange(self.seen)
+            if slot < self.capacity:
+                self.reservoir[slot] = item
+
+    def items(self) -> list:
+        """
+        Retourne une copie des éléments conservés.
+
+        :return: Liste des éléments de l'échantillon.
+        """
+        return list(self.reservoir)
+
+
+####################################################################################################
+### Classe AddressStats ############################################################################
+####################################################################################################
+
+class AddressStats:
+    """
+    Statistiques en flux des adresses : adresses inconnues, fréquences, nombre de valeurs
+    distinctes et adresses les plus fréquentes.
+    """
+
+    def __init__(self, top_k: int = 10):
+        """
+        Initialise les statistiques.
+
+        :param top_k: Nombre d'adresses les plus fréquentes suivies.
+        """
+        self.top_k = top_k
+        self.unseen = 0
+        self.sketch = CountMinSketch()
+        self.cardinality = HyperLogLog()
+        self.top: dict[str, int] = {}
+
+    def add(self, address: str, known: bool) -> None:
+        """
+        Enregistre une adresse, en temps constant.
+
+        :param address: Adresse observée.
+        :param known: True si l'adresse figure dans les données d'entraînement.
+        """
+        if not known:
+            self.unseen += 1
+        self.cardinality.add(address)
+        self.track_top(address, self.sketch.add(address))
+
+    def track_top(self, address: str, estimate: int) -> None:
+        """
+        Met à jour les adresses les plus fréquentes à partir de l'estimation du Count-Min Sketch.
+
+        :param address: Adresse observée.
+        :param estimate: Fréquence estimée de l'adresse.
+        """
+        if address in self.top or len(self.top) < self.top_k:
+            self.top[address] = estimate
+            return
+        least_frequent = min(self.top, key=self.top.get)
+        if estimate > self.top[least_frequent]:
+            del self.top[least_frequent]
+            self.top[address] = estimate
+
+    def summary(self, total: int) -> dict:
+        """
+        Résume les statistiques des adresses.
+
+        :param total: Nombre total d'adresses enregistrées.
+        :return: Dictionnaire du nombre estimé d'adresses distinctes, du taux d'adresses
+            inconnues et des adresses les plus fréquentes.
+        """
+        return {
+            'distinct_estimate': round(self.cardinality.count()),
+            'unseen_rate': self.unseen / total if total else 0.0,
+            'top': dict(sorted(self.top.items(), key=lambda item: item[1], reverse=True))
+        }
+
+
+####################################################################################################
+### Classe MonitorState ############################################################################
+####################################################################################################
+
+class MonitorState:
+    """
+    Statistiques observées par `DriftMonitor`, remplacées d'un bloc lors d'une remise à zéro.
+    """
+
+    def __init__(self, sample_size: int, seed: Optional[int], top_k: int):
+        """
+        Initialise des statistiques vides.
+
+        :param sample_size: Taille de l'échantillon par réservoir des requêtes.
+        :param seed: Graine du générateur aléatoire du réservoir.
+        :param top_k: Nombre d'adresses les plus fréquentes suivies.
+        """
+        self.districts: Counter = Counter()
+        self.hours: Counter = Counter()
+        self.classes: Counter = Counter()
+        self.addresses = AddressStats(top_k)
+        self.sample = ReservoirSample(sample_size, seed)
+
+    @property
+    def count(self) -> int:
+        """
+        Nombre de prédictions enregistrées.
+
+        :return: Nombre de prédictions.
+        """
+        return self.sample.seen
+
+    def add(self, request: dict, hour: int, known: bool) -> None:
+        """
+        Enregistre une prédiction servie, en temps constant.
+
+        :param request: Requête servie, avec les clés 'PdDistrict', 'Dates', 'Address' et
+            'prediction'.
+        :param hour: Heure de la requête.
+        :param known: True si l'adresse figure dans les données d'entraînement.
+        """
+        self.districts[request['PdDistrict']] += 1
+        self.hours[hour] += 1
+        self.classes[request['prediction']] += 1
+        self.addresses.add(request['Address'], known)
+        self.sample.add(request)
+
+    def drift(self, reference: dict) -> dict:
+        """
+        Calcule les scores de dérive (PSI) par rapport au profil de référence.
+
+        :param reference: Profil des données d'entraînement (voir `DriftMonitor`).
+        :return: Dictionnaire des scores de dérive.
+        """
+        total = self.count
+        unseen_rate = reference['unseen_rate']
+        return {
+            'PdDistrict': population_stability_index(reference['districts'], self.districts),
+            'hour': population_stability_index(reference['hours'], self.hours),
+            'prediction': population_stability_index(reference['classes'], self.classes),
+            # Part des adresses inconnues à l'entraînement, comparée à celle de test.csv
+            'Address': population_stability_index(
+                {'known': 1 - unseen_rate, 'unseen': unseen_rate},
+                {'known': total - self.addresses.unseen, 'unseen': self.addresses.unseen}
+            )
+        }
+
+
+####################################################################################################
+### Classe DriftMonitor ############################################################################
+####################################################################################################
+
+class DriftMonitor:
+    """
+    Suivi en flux des prédictions servies et de la dérive par rapport aux données d'entraînement.
+    """
+
+    # Seuil de PSI au-delà duquel la dérive est jugée importante
+    psi_threshold: float = 0.25
+    # Nombre minimal de prédictions avant de recommander un ré-entraînement
+    min_samples: int = 100
+    # Nombre d'adresses les plus fréquentes suivies
+    top_k: int = 10
+
+    def __init__(self, reference: dict, sample_size: int = 500, seed: Optional[int] = None):
+        """
+        Initialise le suivi.
+
+        :param reference: Profil des données d'entraînement (voir `AI.reference_profile`), avec
+            les clés 'districts', 'hours' et 'classes' (comptages par catégorie), 'addresses'
+            (ensemble des adresses connues) et 'unseen_rate' (taux d'adresses inconnues attendu).
+        :param sample_size: Taille de l'échantillon par réservoir des requêtes.
+        :param seed: Graine du générateur aléatoire du réservoir.
+        """
+        self.reference = reference
+        self.sample_size = sample_size
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.state = MonitorState(sample_size, seed, self.top_k)
+
+    def reset(self) -> None:
+        """
+        Remet à zéro les statistiques observées (par exemple après un ré-entraînement).
+        """
+        state = MonitorState(self.sample_size, self.seed, self.top_k)
+        with self.lock:
+            self.state = state
+
+    def record(self, district: str, dates: str, address: str, prediction: str) -> None:
+        """
+        Enregistre une prédiction servie, en temps constant.
+
+        :param district: District de police de la requête.
+        :param dates: Date de la requête au format "AAAA-MM-JJ HH:MM:SS".
+        :param address: Adresse de la requête.
+        :param prediction: Prédiction retournée.
+        """
+        request = {"PdDistrict": district, "Dates": dates,
+                   "Address": address, "prediction": prediction}
+        hour = int(dates[11:13])
+        known = address in self.reference['addresses']
+        with self.lock:
+            self.state.add(request, hour, known)
+
+    def report(self) -> dict:
+        """
+        Calcule les scores de dérive et résume les statistiques observées.
+
+        :return: Dictionnaire du rapport de dérive.
+        """
+        with self.lock:
+            state = self.state
+            drift = state.drift(self.reference)
+            total = state.count
+            return {
+                'predictions': total,
+                'drift': drift,
+                'retrain_recommended': total >= self.min_samples and any(
+                    score > self.psi_threshold for score in drift.values()
+                ),
+                'districts': dict(state.districts),
+                'hours': {hour: state.hours[hour] for hour in sorted(state.hours)},
+                'classes': dict(state.classes),
+                'addresses': state.addresses.summary(total)
+            }
+
+    def get_sample(self) -> list[dict]:
+        """
+        Retourne l'échantillon par réservoir des requêtes servies.
+
+        :return: Liste des requêtes échantillonnées.
+        """
+        with self.lock:
+            return self.state.sample.items()
+
+
+####################################################################################################
+### Test d'utilisation #############################################################################
+####################################################################################################
+
+# Mesure le coût d'enregistrement d'une prédiction
+if __name__ == "__main__":
+    import time
+
+    rng = random.Random(42)
+    monitor = DriftMonitor({
+        'districts': {'SOUTHERN': 1, 'MISSION': 1},
+        'hours': {hour: 1 for hour in range(24)},
+        'classes': {'Aucune Action Juridique Prise': 1},
+        'addresses': set(),
+        'unseen_rate': 1.0
+    }, seed=42)
+    records = [
+        (rng.choice(['SOUTHERN', 'MISSION']), f"2015-05-13 {rng.randint(0, 23):02d}:00:00",
+         f"{rng.randint(1, 5000)} Block of BRYANT ST", 'Aucune Action Juridique Prise')
+        for _ in range(100000)
+    ]
+
+    start = time.perf_counter()
+    for record in records:
+        monitor.record(*record)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(records)} prédictions enregistrées en {elapsed:.2f} s, "
+          f"soit {elapsed / len(records) * 1e6:.1f} µs par prédiction")
+    print(monitor.report()['addresses']['distinct_estimate'], "adresses distinctes estimées")
+
+####################################################################################################
+### Fin du fichier monitoring.py ###################################################################
+####################################################################################################
@@ -0,0 +1,517 @@
+"""
+Outil de test de charge pour l'API de prédiction de crimes à San Francisco.
+
+Ce module démarre l'application FastAPI dans un sous-processus (`uvicorn --workers N`), avec un
+géolocalisateur local à la place de Nominatim (latence et taux d'échec configurables), puis rejoue
+depuis le processus courant des requêtes construites à partir d'incidents tirés de `test.csv`. Pour
+chaque niveau de concurrence, il affiche le débit (req/s) et les latences p50/p95/p99 de chaque
+route, puis le point de saturation pour le nombre de workers donné.
+
+Le serveur et le générateur de charge ne partagent donc pas le même interpréteur : les workers sont
+de vrais processus uvicorn, comme en production.
+
+À lancer depuis le dossier AI, avec les fichiers de données dans DataSet. Exemple :
+    python loadtest.py --workers 4 --concurrency 1,2,4,8,16 --duration 20 --geocoder-latency-ms 50
+"""
+
+####################################################################################################
+### Importation des modules nécessaires ############################################################
+####################################################################################################
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Localisation retournée par le géolocalisateur local, compatible avec celle de geopy
+Location = namedtuple("Location", ["address", "latitude", "longitude"])
+
+# Routes rejouées et leur poids par défaut dans le mélange de requêtes
+DEFAULT_MIX: dict[str, float] = {"predict": 70, "predict2": 10, "address": 10, "position": 10}
+
+
+####################################################################################################
+### Géolocalisateur local ##########################################################################
+####################################################################################################
+
+class FakeGeolocator:
+    """
+    Géolocalisateur local remplaçant Nominatim, avec une latence et un taux d'échec configurables.
+    Il ne connaît que les adresses des incidents échantillonnés.
+    """
+
+    def __init__(self, incidents: list[dict], latency_ms: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialise le géolocalisateur local.
+
+        :param incidents: Incidents échantillonnés (lignes de test.csv).
+        :param latency_ms: Latence simulée de chaque appel (en ms).
+        :param failure_rate: Proportion d'appels qui échouent (entre 0 et 1).
+        :param seed: Graine du générateur aléatoire des échecs.
+        """
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.by_address: dict[str, Location] = {}
+        self.by_position: dict[tuple[float, float], Location] = {}
+        for incident in incidents:
+            location = Location(incident["Address"], float(incident["Y"]), float(incident["X"]))
+            self.by_address[location.address] = location
+            self.by_position[(location.latitude, location.longitude)] = location
+
+    def simulate_call(self):
+        """
+        Simule la latence du service et lève une erreur selon le taux d'échec.
+        """
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+        with self.lock:
+            failed = self.random.random() < self.failure_rate
+        if failed:
+            # pylint: disable-next=import-outside-toplevel
+            from geopy.exc import GeocoderServiceError
+            raise GeocoderServiceError("Échec simulé du géolocalisateur local")
+
+    def geocode(self, query: str) -> Optional[Location]:
+        """
+        Retourne la localisation d'une adresse connue, None sinon.
+
+        :param query: Adresse à géolocaliser.
+        :return: Localisation de l'adresse.
+        """
+        self.simulate_call()
+        return self.by_address.get(query)
+
+    def reverse(self, position) -> Location:
+        """
+        Retourne la localisation connue la plus proche d'une position.
+
+        :param position: Tuple (latitude, longitude).
+        :return: Localisation la plus proche.
+        """
+        self.simulate_call()
+        latitude, longitude = float(position[0]), float(position[1])
+        location = self.by_position.get((latitude, longitude))
+        if location is None:
+            location = min(
+                self.by_position.values(),
+                key=lambda loc: (loc.latitude - latitude) ** 2 + (loc.longitude - longitude) ** 2
+            )
+        return location
+
+
+####################################################################################################
+### Construction des requêtes ######################################################################
+####################################################################################################
+
+def sample_incidents(test_file_path: str, size: int, seed: Optional[int] = None) -> list[dict]:
+    """
+    Tire un échantillon uniforme d'incidents de test.csv (échantillonnage par réservoir).
+
+    :param test_file_path: Chemin du fichier test.csv.
+    :param size: Nombre d'incidents à tirer.
+    :param seed: Graine du générateur aléatoire.
+    :return: Liste des incidents tirés.
+    """
+    rng = random.Random(seed)
+    sample: list[dict] = []
+    with open(test_file_path, newline="", encoding="utf-8") as file:
+        for index, row in enumerate(csv.DictReader(file)):
+            if index < size:
+                sample.append(row)
+            else:
+                slot = rng.randint(0, index)
+                if slot < size:
+                    sample[slot] = row
+    if not sample:
+        raise ValueError(f"Aucun incident dans {test_file_path}")
+    return sample
+
+
+def build_date(dates: str) -> dict:
+    """
+    Convertit le champ Dates de test.csv au format du modèle Date de l'API.
+
+    :param dates: Date au format "AAAA-MM-JJ HH:MM:SS".
+    :return: Dictionnaire au format du modèle Date.
+    """
+    day, hour = dates.split(" ")
+    annee, mois, jour = (int(value) for value in day.split("-"))
+    heure, minute, seconde = (int(value) for value in hour.split(":"))
+    return {"annee": annee, "mois": mois, "jour": jour,
+            "heure": heure, "minute": minute, "seconde": seconde}
+
+
+def build_request(route: str, incident: dict) -> tuple[str, str, Optional[dict]]:
+    """
+    Construit une requête pour une route à partir d'un incident.
+
+    :param route: Nom de la route (predict, predict2, address ou position).
+    :param incident: Incident tiré de test.csv.
+    :return: Tuple (méthode HTTP, chemin, corps JSON).
+    """
+    position = {"latitude": float(incident["Y"]), "longitude": float(incident["X"])}
+    if route == "predict":
+        return "POST", "/predict", {
+            "dates": build_date(incident["Dates"]),
+            "pdDistrict": incident["PdDistrict"],
+            "adresse": incident["Address"],
+            "position": position
+        }
+    if route == "predict2":
+        return "POST", "/predict2", {
+            "dates": build_date(incident["Dates"]),
+            "pdDistrict": incident["PdDistrict"],
+            "adresse": incident["Address"]
+        }
+    if route == "address":
+        return "GET", "/address/" + urllib.parse.quote(incident["Address"], safe=""), None
+    if route == "position":
+        return "POST", "/address", position
+    raise ValueError(f"Route inconnue : {route}")
+
+
+def build_pools(incidents: list[dict], mix: dict[str, float]) -> dict[str, list[dict]]:
+    """
+    Construit la liste des incidents utilisables par chaque route.
+
+    Les adresses d'intersection ("A ST / B ST") sont exclues de la route `address` : le "/"
+    coupe le chemin de GET /address/{address}, qui répond alors toujours 404.
+
+    :param incidents: Incidents échantillonnés.
+    :param mix: Poids de chaque route.
+    :return: Dictionnaire route -> incidents.
+    """
+    pools = {route: incidents for route in mix}
+    if "address" in pools:
+        pools["address"] = [incident for incident in incidents if "/" not in incident["Address"]]
+        if not pools["address"]:
+            raise ValueError("Aucune adresse sans intersection pour la route address")
+    return pools
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """
+    Lit le mélange de routes au format "predict=70,address=30".
+
+    :param mix: Mélange de routes.
+    :return: Dictionnaire route -> poids.
+    """
+    weights: dict[str, float] = {}
+    for item in mix.split(","):
+        route, _, weight = item.partition("=")
+        if route.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Route inconnue : {route.strip()}")
+        weights[route.strip()] = float(weight)
+    return weights
+
+
+####################################################################################################
+### Statistiques ###################################################################################
+####################################################################################################
+
+def percentile(sorted_values: list[float], ratio: float) -> float:
+    """
+    Retourne le centile d'une liste triée (méthode du rang le plus proche).
+
+    :param sorted_values: Valeurs triées.
+    :param ratio: Centile voulu (entre 0 et 1).
+    :return: Valeur du centile, 0 si la liste est vide.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(ratio * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(results: list[tuple[str, float, int]], elapsed: float) -> dict:
+    """
+    Calcule le débit et les latences de chaque route.
+
+    Les réponses 502 correspondent aux échecs du géolocalisateur (injectés par le géolocalisateur
+    local) : elles sont comptées à part et ne sont pas des erreurs du serveur.
+
+    :param results: Liste de tuples (route, latence en ms, code HTTP, 0 si erreur réseau).
+    :param elapsed: Durée de la mesure (en s).
+    :return: Dictionnaire route -> statistiques, avec une entrée "total".
+    """
+    by_route: dict[str, list[tuple[float, int]]] = {}
+    for route, latency_ms, status in results:
+        by_route.setdefault(route, []).append((latency_ms, status))
+        by_route.setdefault("total", []).append((latency_ms, status))
+
+    summary = {}
+    for route, values in by_route.items():
+        latencies = sorted(latency for latency, _ in values)
+        summary[route] = {
+            "requests": len(values),
+            "errors": sum(1 for _, status in values
+                          if status == 0 or (status >= 500 and status != 502)),
+            "geocoder_errors": sum(1 for _, status in values if status == 502),
+            "rejected": sum(1 for _, status in values if 400 <= status < 500),
+            "rps": len(values) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99)
+        }
+    return summary
+
+
+def find_saturation(levels: list[dict], min_gain: float) -> Optional[dict]:
+    """
+    Trouve le point de saturation : le premier niveau de concurrence au-delà duquel le débit
+    n'augmente plus d'au moins `min_gain`, ou à partir duquel des erreurs serveur apparaissent.
+    Les échecs injectés du géolocalisateur ne sont pas pris en compte.
+
+    :param levels: Résultats par niveau de concurrence, dans l'ordre croissant.
+    :param min_gain: Gain de débit relatif minimal (ex: 0.1 pour 10 %).
+    :return: Résultat du niveau de saturation, None si elle n'est pas atteinte.
+    """
+    for previous, current in zip(levels, levels[1:]):
+        if current["summary"]["total"]["errors"] > 0:
+            return previous
+        previous_rps = previous["summary"]["total"]["rps"]
+        if current["summary"]["total"]["rps"] < previous_rps * (1 + min_gain):
+            return previous
+    return None
+
+
+####################################################################################################
+### Exécution ######################################################################################
+####################################################################################################
+
+def create_app():
+    """
+    Fabrique de l'application utilisée par chaque worker uvicorn du test de charge : installe le
+    géolocalisateur local, configuré par les variables d'environnement LOADTEST_*, puis retourne
+    l'application de main.py.
+
+    :return: Application FastAPI.
+    """
+    # pylint: disable=import-outside-toplevel
+    from Class.address import set_geolocator
+
+    seed = int(os.environ["LOADTEST_SEED"])
+    incidents = sample_incidents(os.environ["LOADTEST_TEST_FILE"],
+                                 int(os.environ["LOADTEST_SAMPLE"]), seed)
+    set_geolocator(FakeGeolocator(incidents,
+                                  float(os.environ["LOADTEST_GEOCODER_LATENCY_MS"]),
+                                  float(os.environ["LOADTEST_GEOCODER_FAILURE_RATE"]), seed))
+
+    from main import app
+    return app
+
+
+def start_server(args: argparse.Namespace) -> subprocess.Popen:
+    """
+    Démarre l'API dans un sous-processus uvicorn avec `args.workers` workers.
+
+    :param args: Arguments de la ligne de commande.
+    :return: Sous-processus du serveur.
+    """
+    env = dict(os.environ,
+               LOADTEST_TEST_FILE=args.test_file,
+               LOADTEST_SAMPLE=str(args.sample),
+               LOADTEST_SEED=str(args.seed),
+               LOADTEST_GEOCODER_LATENCY_MS=str(args.geocoder_latency_ms),
+               LOADTEST_GEOCODER_FAILURE_RATE=str(args.geocoder_failure_rate))
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "loadtest:create_app", "--factory",
+         "--host", args.host, "--port", str(args.port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        env=env
+    )
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, workers: int,
+                     timeout: float) -> None:
+    """
+    Attend que la sonde de disponibilité de l'API réponde 200 pour tous les workers.
+
+    Chaque worker entraîne sa propre IA et les connexions sont réparties entre eux : on exige
+    donc 10 réponses 200 consécutives par worker.
+
+    :param base_url: URL de base de l'API.
+    :param server: Sous-processus du serveur.
+    :param workers: Nombre de workers du serveur.
+    :param timeout: Délai maximal d'attente (en s).
+    """
+    deadline = time.monotonic() + timeout
+    consecutive = 0
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {server.returncode})")
+        try:
+            with urllib.request.urlopen(base_url + "/health/ready", timeout=5) as response:
+                consecutive = consecutive + 1 if response.status == 200 else 0
+        except (urllib.error.URLError, ConnectionError):
+            consecutive = 0
+        if consecutive >= 10 * workers:
+            return
+        if consecutive == 0:
+            time.sleep(1)
+    raise TimeoutError(f"L'API n'est pas prête après {timeout:.0f} s")
+
+
+def send(base_url: str, method: str, path: str, body: Optional[dict]) -> int:
+    """
+    Envoie une requête HTTP et retourne son code de statut (0 en cas d'erreur réseau).
+
+    :param base_url: URL de base de l'API.
+    :param method: Méthode HTTP.
+    :param path: Chemin de la route.
+    :param body: Corps JSON, None si aucun.
+    :return: Code de statut HTTP.
+    """
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return 0
+
+
+def run_level(base_url: str, pools: dict[str, list[dict]], mix: dict[str, float],
+              concurrency: int, args: argparse.Namespace) -> dict:
+    """
+    Rejoue des requêtes pendant `args.duration` secondes avec `concurrency` clients simultanés.
+
+    :param base_url: URL de base de l'API.
+    :param pools: Incidents utilisables par chaque route (voir `build_pools`).
+    :param mix: Poids de chaque route.
+    :param concurrency: Nombre de clients simultanés.
+    :param args: Arguments de la ligne de commande (durée de la mesure en s et graine du
+        générateur aléatoire).
+    :return: Résultat du niveau de concurrence.
+    """
+    routes, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + args.duration
+
+    def client(index: int) -> list[tuple[str, float, int]]:
+        rng = random.Random(None if args.seed is None else args.seed + index)
+        results = []
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, weights)[0]
+            method, path, body = build_request(route, rng.choice(pools[route]))
+            start = time.perf_counter()
+            status = send(base_url, method, path, body)
+            results.append((route, (time.perf_counter() - start) * 1000, status))
+        return results
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = [result for results in executor.map(client, range(concurrency))
+                   for result in results]
+    elapsed = time.monotonic() - start
+
+    return {"concurrency": concurrency, "summary": summarize(results, elapsed)}
+
+
+def print_level(level: dict) -> None:
+    """
+    Affiche les statistiques d'un niveau de concurrence.
+
+    :param level: Résultat du niveau de concurrence.
+    """
+    print(f"\nConcurrence : {level['concurrency']}")
+    print(f"{'route':<10} {'req':>7} {'err':>5} {'geo':>5} {'4xx':>5} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, stats in sorted(level["summary"].items(), key=lambda item: item[0] == "total"):
+        print(f"{route:<10} {stats['requests']:>7} {stats['errors']:>5} "
+              f"{stats['geocoder_errors']:>5} {stats['rejected']:>5} {stats['rps']:>9.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+
+def main() -> None:
+    """
+    Point d'entrée de l'outil de test de charge.
+    """
+    parser = argparse.ArgumentParser(description="Test de charge de l'API SF-Crime-Prediction-AI")
+    parser.add_argument("--test-file", default=os.path.join("DataSet", "test.csv"),
+                        help="Fichier CSV des incidents à rejouer")
+    parser.add_argument("--sample", type=int, default=1000,
+                        help="Nombre d'incidents tirés de test.csv")
+    parser.add_argument("--mix", default=",".join(f"{k}={v:g}" for k, v in DEFAULT_MIX.items()),
+                        help="Poids des routes, ex: predict=70,predict2=10,address=10,position=10")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de workers (processus) uvicorn du serveur")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32",
+                        help="Niveaux de concurrence client, séparés par des virgules")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="Durée de chaque niveau de concurrence (en s)")
+    parser.add_argument("--geocoder-latency-ms", type=float, default=0.0,
+                        help="Latence simulée du géolocalisateur local (en ms)")
+    parser.add_argument("--geocoder-failure-rate", type=float, default=0.0,
+                        help="Taux d'échec du géolocalisateur local (entre 0 et 1)")
+    parser.add_argument("--saturation-gain", type=float, default=0.1,
+                        help="Gain de débit relatif minimal en deçà duquel l'API est saturée")
+    parser.add_argument("--ready-timeout", type=float, default=1800.0,
+                        help="Délai maximal d'attente de l'entraînement de l'IA (en s)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Fichier où écrire les résultats au format JSON")
+    args = parser.parse_args()
+
+    incidents = sample_incidents(args.test_file, args.sample, args.seed)
+
+    base_url = f"http://{args.host}:{args.port}"
+    print(f"Démarrage de l'API sur {base_url} ({args.workers} workers)...")
+    server = start_server(args)
+    try:
+        wait_until_ready(base_url, server, args.workers, args.ready_timeout)
+        print("API prête.")
+
+        mix = parse_mix(args.mix)
+        pools = build_pools(incidents, mix)
+        levels = []
+        for concurrency in (int(value) for value in args.concurrency.split(",")):
+            level = run_level(base_url, pools, mix, concurrency, args)
+            print_level(level)
+            levels.append(level)
+    finally:
+        server.terminate()
+        server.wait()
+
+    saturation = find_saturation(levels, args.saturation_gain)
+    if saturation is None:
+        print(f"\nSaturation non atteinte avec {args.workers} workers.")
+    else:
+        print(f"\nSaturation avec {args.workers} workers : {saturation['concurrency']} clients, "
+              f"{saturation['summary']['total']['rps']:.1f} req/s.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"workers": args.workers, "levels": levels,
+                       "saturation": saturation}, file, indent=2)
+
+
+####################################################################################################
+### Point d'entrée #################################################################################
+####################################################################################################
+
+if __name__ == "__main__":
+    main()
+
+####################################################################################################
+### Fin du fichier loadtest.py #####################################################################
+####################################################################################################
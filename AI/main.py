@@ -3,20 +3,30 @@ Module principal pour l'application de prédiction de crimes à San Francisco.
 
 Ce module initialise l'application FastAPI, configure les routes et démarre le serveur.
 Il utilise également une classe AI pour effectuer des prédictions basées sur les données fournies.
+
+Le démarrage se fait en deux phases : l'application répond immédiatement (sonde de vivacité
+`/health/live`, documentation), puis l'IA est importée et entraînée en arrière-plan. La sonde de
+disponibilité `/health/ready` ne répond 200 qu'une fois l'IA prête ; en attendant, les routes qui en
+dépendent répondent 503. Les modules lourds (pandas, scikit-learn, category_encoders, geopy) ne sont
+donc pas importés au chargement de ce module.
 """
 
 ####################################################################################################
 ### Importation des modules nécessaires ############################################################
 ####################################################################################################
 
+import os
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Optional
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from Class.address import Address
-from Class.ai import AI, Data
+from Class.monitoring import DriftMonitor
 
 
 ####################################################################################################
@@ -112,15 +122,24 @@ class MyAPI(FastAPI):
 
     def __init__(self):
         """
-        Initialise l'application FastAPI et ajoute les routes.
+        Initialise l'application FastAPI et ajoute les routes. L'IA est chargée au démarrage du
+        serveur, en arrière-plan (voir `lifespan`).
         """
         super().__init__(
             title="SF-Crime-Prediction-AI",
             description="API pour prédire les crimes à San Francisco",
             version="1.0.0",
             docs_url="/docs",  # URL pour Swagger UI
-            redoc_url="/redoc"  # URL pour ReDoc
+            redoc_url="/redoc",  # URL pour ReDoc
+            lifespan=self.lifespan
         )
+        # IA chargée en arrière-plan, None tant qu'elle n'est pas prête
+        self._ai = None
+        # Erreur survenue pendant le chargement de l'IA, le cas échéant
+        self.ai_error: Optional[str] = None
+        # Suivi de la dérive des prédictions servies, créé avec l'IA
+        self.monitor: Optional[DriftMonitor] = None
+        self._ai_thread: Optional[threading.Thread] = None
         # noinspection PyTypeChecker
         self.add_middleware(
             CORSMiddleware,
@@ -130,10 +149,75 @@ class MyAPI(FastAPI):
             allow_headers=["*"],  # Permettre tous les en-têtes
         )
         self.add_routes()
+
+    @asynccontextmanager
+    async def lifespan(self, _app: FastAPI):
+        """
+        Démarre le chargement de l'IA en arrière-plan au démarrage du serveur.
+        """
+        self.start_ai()
+        yield
+
+    def start_ai(self):
+        """
+        Lance le chargement de l'IA dans un thread, s'il n'est pas déjà lancé.
+        """
+        if self._ai_thread is None:
+            self._ai_thread = threading.Thread(target=self.load_ai, name="ai-loader", daemon=True)
+            self._ai_thread.start()
+
+    def load_ai(self):
+        """
+        Importe et entraîne l'IA. Les modules d'entraînement ne sont importés qu'ici.
+        """
         print("Initialisation de l'IA...")
-        self.ai = AI("./DataSet", "train.csv", "test.csv")
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            from Class.ai import AI, EnsembleConfig
+
+            # Modèles de l'ensemble, séparés par des virgules (ex: "tree,rf,hgb")
+            models = os.environ.get("AI_MODELS", "")
+            # Budget de latence par prédiction, en millisecondes
+            latency_budget_ms = os.environ.get("AI_LATENCY_BUDGET_MS", "")
+            config = EnsembleConfig(
+                models=[model.strip() for model in models.split(",") if model.strip()] or None,
+                latency_budget_ms=float(latency_budget_ms) if latency_budget_ms else None
+            )
+            self._ai = AI("./DataSet", "train.csv", "test.csv", config=config)
+            self.monitor = DriftMonitor(self._ai.reference_profile())
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self.ai_error = f"{type(e).__name__}: {e}"
+            print(f"Erreur lors de l'initialisation de l'IA : {self.ai_error}")
+            return
         print("IA initialisée.")
 
+    def is_ready(self) -> bool:
+        """
+        Indique si l'IA est chargée et prête à prédire.
+        :return: True si l'IA est prête, False sinon.
+        """
+        return self._ai is not None and self.monitor is not None
+
+    def require_ready(self):
+        """
+        Lève une erreur 503 si l'IA n'est pas encore prête.
+        """
+        if not self.is_ready():
+            raise HTTPException(
+                status_code=503,
+                detail=self.ai_error or "L'IA est en cours d'initialisation.",
+                headers={"Retry-After": "10"}
+            )
+
+    @property
+    def ai(self):
+        """
+        Retourne l'IA, ou lève une erreur 503 si elle n'est pas encore prête.
+        :return: Instance de la classe AI.
+        """
+        self.require_ready()
+        return self._ai
+
     def add_routes(self):
         """
         Ajoute des routes à l'application FastAPI.
@@ -146,13 +230,43 @@ class MyAPI(FastAPI):
             """
             return {"message": "Bonjour, le monde!"}
 
+        @self.get("/health/live")
+        def liveness():
+            """
+            Sonde de vivacité : répond dès que le serveur accepte des requêtes.
+            """
+            return {"status": "alive"}
+
+        @self.get("/health/ready")
+        def readiness():
+            """
+            Sonde de disponibilité : répond 200 uniquement lorsque l'IA est prête.
+            """
+            if self.is_ready():
+                return {"status": "ready"}
+            return JSONResponse(
+                status_code=503,
+                content={"status": "error" if self.ai_error else "starting",
+                         "detail": self.ai_error}
+            )
+
         @self.get("/address/{address}")
         def check_address(address: str):
             """
             Point de terminaison POST qui vérifie la validité d'une adresse et retourne sa latitude
             et sa longitude.
             """
-            addr: Address = Address(address)
+            # pylint: disable-next=import-outside-toplevel
+            from Class.address import Address, geocoder_errors
+
+            try:
+                addr: Address = Address(address)
+            except geocoder_errors() as e:
+                # Retourner une erreur si le service de géolocalisation ne répond pas
+                raise HTTPException(
+                    status_code=502,
+                    detail="Le service de géolocalisation est indisponible."
+                ) from e
             return {
                 "address": addr.address,
                 "valid": addr.is_valid(),
@@ -167,9 +281,19 @@ class MyAPI(FastAPI):
             Point de terminaison POST qui vérifie la validité d'une adresse et retourne sa latitude
             et sa longitude.
             """
-            addr: Address = Address.create_address_by_position(
-                (position.latitude, position.longitude)
-            )
+            # pylint: disable-next=import-outside-toplevel
+            from Class.address import Address, geocoder_errors
+
+            try:
+                addr: Address = Address.create_address_by_position(
+                    (position.latitude, position.longitude)
+                )
+            except geocoder_errors() as e:
+                # Retourner une erreur si le service de géolocalisation ne répond pas
+                raise HTTPException(
+                    status_code=502,
+                    detail="Le service de géolocalisation est indisponible."
+                ) from e
             return {
                 "address": addr.address,
                 "valid": addr.is_valid(),
@@ -198,17 +322,23 @@ class MyAPI(FastAPI):
                            "]"
                 )
 
+            # Vérifier que l'IA est prête avant d'importer ses modules
+            ai = self.ai
+            # pylint: disable-next=import-outside-toplevel
+            from Class.ai import Data
+
             data: Data = Data(
                 Dates=str(crime.dates),
                 DayOfWeek=crime.dates.__day_of_week__(),
                 PdDistrict=crime.pdDistrict,
                 Address=crime.adresse,
-                X=crime.position.latitude,
-                Y=crime.position.longitude
+                X=crime.position.longitude,
+                Y=crime.position.latitude
             )
 
             # Prédire le crime à San Francisco
-            prediction = self.ai.predict(data)
+            prediction = ai.predict(data)
+            self.monitor.record(data.PdDistrict, data.Dates, data.Address, prediction)
 
             # Retourner la prédiction
             return {
@@ -236,8 +366,22 @@ class MyAPI(FastAPI):
                            "]"
                 )
 
+            # Vérifier que l'IA est prête avant d'importer ses modules
+            ai = self.ai
+            # pylint: disable-next=import-outside-toplevel
+            from Class.ai import Data
+            # pylint: disable-next=import-outside-toplevel
+            from Class.address import Address, geocoder_errors
+
             # Création de l'adresse
-            addr = Address(crime.adresse)
+            try:
+                addr = Address(crime.adresse)
+            except geocoder_errors() as e:
+                # Retourner une erreur si le service de géolocalisation ne répond pas
+                raise HTTPException(
+                    status_code=502,
+                    detail="Le service de géolocalisation est indisponible."
+                ) from e
 
             # Vérification de la validité de l'adresse
             if not addr.is_valid():
@@ -249,12 +393,13 @@ class MyAPI(FastAPI):
                 DayOfWeek=crime.dates.__day_of_week__(),
                 PdDistrict=crime.pdDistrict,
                 Address=crime.adresse,
-                X=crime.position.latitude,
-                Y=crime.position.longitude
+                X=addr.longitude,
+                Y=addr.latitude
             )
 
             # Prédire le crime à San Francisco
-            prediction = self.ai.predict(data)
+            prediction = ai.predict(data)
+            self.monitor.record(data.PdDistrict, data.Dates, data.Address, prediction)
 
             # Retourner la prédiction
             return {
@@ -265,10 +410,37 @@ class MyAPI(FastAPI):
         @self.get("/accuracy")
         def get_accuracy():
             """
-            Point de terminaison GET qui retourne les précisions des modèles.
+            Point de terminaison GET qui retourne les précisions des modèles de l'ensemble
+            effectivement utilisés.
             """
             return self.ai.get_accuracy()
 
+        @self.get("/monitoring")
+        def get_monitoring():
+            """
+            Point de terminaison GET qui retourne les scores de dérive et les statistiques des
+            prédictions servies depuis le démarrage ou la dernière remise à zéro.
+            """
+            self.require_ready()
+            return self.monitor.report()
+
+        @self.get("/monitoring/sample")
+        def get_monitoring_sample():
+            """
+            Point de terminaison GET qui retourne un échantillon uniforme des requêtes servies.
+            """
+            self.require_ready()
+            return self.monitor.get_sample()
+
+        @self.post("/monitoring/reset")
+        def reset_monitoring():
+            """
+            Point de terminaison POST qui remet à zéro les statistiques des prédictions servies.
+            """
+            self.require_ready()
+            self.monitor.reset()
+            return {"status": "reset"}
+
 
 ####################################################################################################
 ### Point d'entrée de l'application ################################################################
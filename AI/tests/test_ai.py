@@ -0,0 +1,189 @@
+"""
+Tests de la sélection et du vote des modèles de l'ensemble du module Class.ai.
+
+Les membres sont des modèles factices dont la précision et la latence sont fixées : aucun modèle
+n'est entraîné.
+
+À lancer depuis le dossier AI : python -m unittest discover -s tests
+"""
+
+####################################################################################################
+### Importation des modules nécessaires ############################################################
+####################################################################################################
+
+import unittest
+
+from Class.ai import AI, ModelAccuracy, ModelEntry, ModelRegistry, select_within_budget
+
+
+####################################################################################################
+### Fonctions utilitaires ##########################################################################
+####################################################################################################
+
+def make_entry(name: str, accuracy: float, latency_ms: float) -> ModelEntry:
+    """
+    Crée un membre factice, déjà évalué.
+
+    :param name: Nom du membre.
+    :param accuracy: Précision du membre (en %).
+    :param latency_ms: Latence du membre (en ms).
+    :return: Membre factice.
+    """
+    entry = ModelEntry(name, name, factory=lambda: None)
+    entry.accuracy = accuracy
+    entry.latency_ms = latency_ms
+    return entry
+
+
+def make_ai(entries: list[ModelEntry]) -> AI:
+    """
+    Crée une instance de AI sans données ni entraînement, avec les membres donnés.
+
+    :param entries: Membres de l'ensemble.
+    :return: Instance de AI.
+    """
+    ai = AI.__new__(AI)
+    ai.members = entries
+    ai.acc = ModelAccuracy(
+        accuracies={entry.name: entry.accuracy for entry in entries},
+        latencies={entry.name: entry.latency_ms for entry in entries}
+    )
+    return ai
+
+
+####################################################################################################
+### Tests du registre ##############################################################################
+####################################################################################################
+
+class TestModelRegistry(unittest.TestCase):
+    """
+    Tests du registre des modèles.
+    """
+
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.registry.register('tree', "Arbre", lambda: None)
+        self.registry.register('rf', "Forêt", lambda: None)
+
+    def test_get_in_given_order(self):
+        """
+        Les membres sont retournés dans l'ordre demandé.
+        """
+        self.assertEqual([entry.name for entry in self.registry.get(['rf', 'tree'])],
+                         ['rf', 'tree'])
+
+    def test_get_rejects_unknown_and_duplicates(self):
+        """
+        Les noms inconnus et les noms en double sont refusés.
+        """
+        with self.assertRaises(ValueError):
+            self.registry.get(['tree', 'svm'])
+        with self.assertRaises(ValueError):
+            self.registry.get(['tree', 'tree'])
+
+    def test_register_rejects_reserved_and_existing(self):
+        """
+        Les noms réservés et les noms déjà enregistrés sont refusés.
+        """
+        with self.assertRaises(ValueError):
+            self.registry.register('global_accuracy', "Réservé", lambda: None)
+        with self.assertRaises(ValueError):
+            self.registry.register('tree', "Doublon", lambda: None)
+
+
+####################################################################################################
+### Tests de la sélection selon la latence #########################################################
+####################################################################################################
+
+class TestSelectWithinBudget(unittest.TestCase):
+    """
+    Tests de la sélection des membres selon le budget de latence.
+    """
+
+    def setUp(self):
+        self.tree = make_entry('tree', accuracy=70, latency_ms=1)
+        self.rf = make_entry('rf', accuracy=80, latency_ms=10)
+        self.knn = make_entry('knn', accuracy=60, latency_ms=3)
+        self.entries = [self.tree, self.rf, self.knn]
+
+    def test_no_budget_keeps_all(self):
+        """
+        Sans budget, tous les membres sont conservés.
+        """
+        self.assertEqual(select_within_budget(self.entries, None), self.entries)
+
+    def test_most_accurate_first_in_original_order(self):
+        """
+        Les membres les plus précis sont retenus en premier, dans leur ordre d'origine.
+        """
+        self.assertEqual(select_within_budget(self.entries, 11), [self.tree, self.rf])
+        self.assertEqual(select_within_budget(self.entries, 14), self.entries)
+
+    def test_skips_member_over_remaining_budget(self):
+        """
+        Un membre trop lent est écarté sans empêcher la sélection des suivants.
+        """
+        self.assertEqual(select_within_budget(self.entries, 5), [self.tree, self.knn])
+
+    def test_fallback_to_fastest(self):
+        """
+        Si aucun membre ne tient dans le budget, le plus rapide est conservé.
+        """
+        self.assertEqual(select_within_budget(self.entries, 0.5), [self.tree])
+
+
+####################################################################################################
+### Tests du vote ##################################################################################
+####################################################################################################
+
+class TestDetermineFinalPrediction(unittest.TestCase):
+    """
+    Tests du vote majoritaire et du départage des égalités.
+    """
+
+    def test_two_members_tie_goes_to_most_accurate(self):
+        """
+        Avec deux membres en désaccord, la prédiction du plus précis l'emporte.
+        """
+        ai = make_ai([make_entry('tree', 70, 1), make_entry('rf', 80, 10)])
+        self.assertEqual(ai.determine_final_prediction([(1,), (2,)]), 2)
+
+    def test_two_members_agree(self):
+        """
+        Avec deux membres d'accord, leur prédiction l'emporte.
+        """
+        ai = make_ai([make_entry('tree', 70, 1), make_entry('rf', 80, 10)])
+        self.assertEqual(ai.determine_final_prediction([(3,), (3,)]), 3)
+
+    def test_three_members_all_disagree(self):
+        """
+        Avec trois membres en désaccord, la prédiction du plus précis l'emporte.
+        """
+        ai = make_ai([make_entry('tree', 70, 1), make_entry('rf', 80, 10),
+                      make_entry('knn', 60, 3)])
+        self.assertEqual(ai.determine_final_prediction([(1,), (2,), (3,)]), 2)
+
+    def test_four_members_majority_beats_most_accurate(self):
+        """
+        Avec quatre membres, une majorité l'emporte sur le membre le plus précis.
+        """
+        ai = make_ai([make_entry('tree', 70, 1), make_entry('rf', 90, 10),
+                      make_entry('knn', 60, 3), make_entry('hgb', 75, 2)])
+        self.assertEqual(ai.determine_final_prediction([(1,), (2,), (1,), (1,)]), 1)
+
+    def test_four_members_two_two_tie(self):
+        """
+        Avec quatre membres à égalité deux contre deux, le camp du plus précis l'emporte.
+        """
+        ai = make_ai([make_entry('tree', 70, 1), make_entry('rf', 90, 10),
+                      make_entry('knn', 60, 3), make_entry('hgb', 75, 2)])
+        self.assertEqual(ai.determine_final_prediction([(1,), (2,), (2,), (1,)]), 2)
+        self.assertEqual(ai.determine_final_prediction([(1,), (3,), (2,), (1,)]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+####################################################################################################
+### Fin du fichier test_ai.py ######################################################################
+####################################################################################################
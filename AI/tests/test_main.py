@@ -0,0 +1,71 @@
+"""
+Tests de bout en bout des routes de prédiction de l'API du module main.
+
+L'IA est entraînée sur les fichiers du dossier DataSet : les tests sont ignorés s'ils sont absents.
+
+À lancer depuis le dossier AI : python -m unittest discover -s tests
+"""
+
+####################################################################################################
+### Importation des modules nécessaires ############################################################
+####################################################################################################
+
+import os
+import time
+import unittest
+
+from fastapi.testclient import TestClient
+
+import main
+from loadtest import build_request, sample_incidents
+
+# Fichiers de données chargés par l'API, relatifs au dossier AI
+TRAIN_FILE = os.path.join("DataSet", "train.csv")
+TEST_FILE = os.path.join("DataSet", "test.csv")
+
+
+####################################################################################################
+### Tests de la route /predict #####################################################################
+####################################################################################################
+
+@unittest.skipUnless(os.path.isfile(TRAIN_FILE) and os.path.isfile(TEST_FILE),
+                     "train.csv et test.csv sont absents du dossier DataSet")
+class TestPredictDrift(unittest.TestCase):
+    """
+    Rejoue des incidents de test.csv sur /predict et vérifie l'absence de dérive.
+    """
+
+    # Nombre d'incidents rejoués
+    size: int = 500
+    # Score de dérive maximal attendu (distribution stable) : une inversion de la latitude et de la
+    # longitude donne un score de l'ordre de 1
+    max_psi: float = 0.1
+
+    def test_replayed_test_rows_do_not_drift(self):
+        """
+        Les prédictions servies pour des incidents de test.csv suivent la référence.
+        """
+        with TestClient(main.MyAPI()) as client:
+            deadline = time.monotonic() + 600
+            while client.get("/health/ready").status_code != 200:
+                self.assertLess(time.monotonic(), deadline, "L'IA n'est pas prête")
+                time.sleep(0.5)
+
+            for incident in sample_incidents(TEST_FILE, self.size, seed=0):
+                _, path, body = build_request("predict", incident)
+                self.assertEqual(client.post(path, json=body).status_code, 200)
+
+            report = client.get("/monitoring").json()
+
+        self.assertEqual(report['predictions'], self.size)
+        self.assertLess(report['drift']['prediction'], self.max_psi)
+        self.assertLess(report['drift']['Address'], self.max_psi)
+        self.assertFalse(report['retrain_recommended'])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+####################################################################################################
+### Fin du fichier test_main.py ####################################################################
+####################################################################################################
@@ -0,0 +1,196 @@
+"""
+Tests des statistiques en flux du module Class.monitoring.
+
+À lancer depuis le dossier AI : python -m unittest discover -s tests
+"""
+
+####################################################################################################
+### Importation des modules nécessaires ############################################################
+####################################################################################################
+
+import random
+import unittest
+from collections import Counter
+
+from Class.monitoring import (CountMinSketch, DriftMonitor, HyperLogLog, ReservoirSample,
+                              population_stability_index)
+
+
+####################################################################################################
+### Tests des sketches #############################################################################
+####################################################################################################
+
+class TestCountMinSketch(unittest.TestCase):
+    """
+    Tests du Count-Min Sketch.
+    """
+
+    def test_estimate_never_below_true_count(self):
+        """
+        L'estimation d'une clé n'est jamais inférieure à son nombre réel d'occurrences.
+        """
+        rng = random.Random(0)
+        sketch = CountMinSketch(width=64, depth=4)
+        counts = Counter(f"adresse {rng.randint(0, 500)}" for _ in range(5000))
+        for key, count in counts.items():
+            sketch.add(key, count)
+        for key, count in counts.items():
+            self.assertGreaterEqual(sketch.estimate(key), count)
+
+    def test_rows_use_distinct_counters(self):
+        """
+        Les lignes d'une même clé ne partagent pas de compteur.
+        """
+        sketch = CountMinSketch()
+        for i in range(1000):
+            self.assertEqual(len(set(sketch.indexes(str(i)))), sketch.depth)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """
+    Tests de l'estimateur HyperLogLog.
+    """
+
+    def test_estimate_within_few_percent(self):
+        """
+        L'estimation est à quelques pourcents près pour 10 000 valeurs distinctes.
+        """
+        estimator = HyperLogLog()
+        for i in range(10000):
+            estimator.add(f"adresse {i}")
+            estimator.add(f"adresse {i}")
+        self.assertAlmostEqual(estimator.count(), 10000, delta=10000 * 0.05)
+
+
+class TestReservoirSample(unittest.TestCase):
+    """
+    Tests de l'échantillon par réservoir.
+    """
+
+    def test_never_exceeds_capacity(self):
+        """
+        L'échantillon ne dépasse jamais sa capacité et compte tous les éléments vus.
+        """
+        sample = ReservoirSample(capacity=50, seed=0)
+        for i in range(1000):
+            sample.add(i)
+            self.assertLessEqual(len(sample), 50)
+        self.assertEqual(len(sample.items()), 50)
+        self.assertEqual(sample.seen, 1000)
+
+
+####################################################################################################
+### Tests de la dérive #############################################################################
+####################################################################################################
+
+class TestPopulationStabilityIndex(unittest.TestCase):
+    """
+    Tests du Population Stability Index.
+    """
+
+    def test_identical_distributions(self):
+        """
+        Le PSI est nul pour deux distributions identiques, même de tailles différentes.
+        """
+        reference = {'SOUTHERN': 30, 'MISSION': 50, 'PARK': 20}
+        live = {'SOUTHERN': 3, 'MISSION': 5, 'PARK': 2}
+        self.assertAlmostEqual(population_stability_index(reference, live), 0.0)
+
+    def test_shifted_distribution(self):
+        """
+        Le PSI dépasse le seuil de dérive importante pour une distribution décalée.
+        """
+        reference = {'SOUTHERN': 30, 'MISSION': 50, 'PARK': 20}
+        live = {'SOUTHERN': 90, 'MISSION': 5, 'PARK': 5}
+        self.assertGreater(population_stability_index(reference, live),
+                           DriftMonitor.psi_threshold)
+
+
+class TestDriftMonitor(unittest.TestCase):
+    """
+    Tests du suivi de la dérive.
+    """
+
+    reference = {
+        'districts': {'SOUTHERN': 50, 'MISSION': 50},
+        'hours': {hour: 10 for hour in range(24)},
+        'classes': {'Aucune Action Juridique Prise': 80, 'Personne Localisée ou Cas Non Fondé': 20},
+        'addresses': {'800 Block of BRYANT ST'},
+        'unseen_rate': 0.05
+    }
+
+    def record_drifted(self, monitor: DriftMonitor, count: int):
+        """
+        Enregistre `count` prédictions très éloignées de la référence.
+        """
+        for _ in range(count):
+            monitor.record('PARK', '2015-05-13 03:00:00', '1 Block of NOWHERE ST',
+                           'Personne Localisée ou Cas Non Fondé')
+
+    def test_no_retrain_below_min_samples(self):
+        """
+        Aucun ré-entraînement n'est recommandé avant `min_samples` prédictions.
+        """
+        monitor = DriftMonitor(self.reference, seed=0)
+        self.record_drifted(monitor, monitor.min_samples - 1)
+        report = monitor.report()
+        self.assertGreater(report['drift']['PdDistrict'], monitor.psi_threshold)
+        self.assertFalse(report['retrain_recommended'])
+
+        self.record_drifted(monitor, 1)
+        self.assertTrue(monitor.report()['retrain_recommended'])
+
+    def record_addresses(self, monitor: DriftMonitor, known: int, unseen: int):
+        """
+        Enregistre des prédictions conformes à la référence, sauf pour la part d'adresses
+        inconnues.
+        """
+        for i in range(known + unseen):
+            address = '800 Block of BRYANT ST' if i < known else f'{i} Block of NOWHERE ST'
+            prediction = ('Personne Localisée ou Cas Non Fondé' if i % 5 == 4
+                          else 'Aucune Action Juridique Prise')
+            monitor.record(('SOUTHERN', 'MISSION')[i % 2], f'2015-05-13 {i % 24:02d}:00:00',
+                           address, prediction)
+
+    def test_address_drift(self):
+        """
+        Le score de dérive des adresses reste faible pour le taux d'adresses inconnues de la
+        référence et recommande un ré-entraînement lorsqu'il augmente fortement.
+        """
+        monitor = DriftMonitor(self.reference, seed=0)
+        self.record_addresses(monitor, known=228, unseen=12)
+        report = monitor.report()
+        self.assertLess(report['drift']['Address'], 0.01)
+        self.assertFalse(report['retrain_recommended'])
+
+        monitor.reset()
+        self.record_addresses(monitor, known=120, unseen=120)
+        report = monitor.report()
+        self.assertGreater(report['drift']['Address'], monitor.psi_threshold)
+        self.assertTrue(report['retrain_recommended'])
+
+    def test_report_and_reset(self):
+        """
+        Le rapport compte les adresses inconnues et la remise à zéro vide les statistiques.
+        """
+        monitor = DriftMonitor(self.reference, seed=0)
+        monitor.record('SOUTHERN', '2015-05-13 23:53:00', '800 Block of BRYANT ST',
+                       'Aucune Action Juridique Prise')
+        self.record_drifted(monitor, 3)
+        report = monitor.report()
+        self.assertEqual(report['predictions'], 4)
+        self.assertEqual(report['addresses']['unseen_rate'], 0.75)
+        self.assertEqual(report['addresses']['top']['1 Block of NOWHERE ST'], 3)
+        self.assertEqual(len(monitor.get_sample()), 4)
+
+        monitor.reset()
+        self.assertEqual(monitor.report()['predictions'], 0)
+        self.assertEqual(monitor.get_sample(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+####################################################################################################
+### Fin du fichier test_monitoring.py ##############################################################
+####################################################################################################